@@ -0,0 +1,2 @@
+def pytest_configure(config):
+    config.addinivalue_line("markers", "perf: hot-path timings against tests/perf_baseline.json (deselect with -m 'not perf')")
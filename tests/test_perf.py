@@ -0,0 +1,42 @@
+"""
+Hot-path timings on a synthetic dataset checked against the committed
+baseline, scaled by how fast this host runs a fixed calibration workload.
+Re-record the baseline with: python StateDashboard.py --benchmark --record-baseline
+"""
+import os
+import sys
+
+import matplotlib
+matplotlib.use('Agg')
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import StateDashboard as sd
+
+
+# Paths that must stay baselined; the others in the baseline are checked too
+REQUIRED_PATHS = ['load_dataset', 'sensitivity_surface', 'score_sampler', 'render_page']
+
+
+@pytest.fixture(scope='module')
+def baseline():
+    recorded = sd.load_perf_baseline()
+    assert recorded is not None, f"missing {sd.PERF_BASELINE_FILE}"
+    return recorded
+
+
+def test_baseline_covers_the_hot_paths(baseline):
+    assert set(REQUIRED_PATHS) <= set(baseline['timings'])
+
+
+@pytest.mark.perf
+def test_hot_paths_within_baseline(baseline):
+    limits = sd.perf_limits(baseline, sd.calibration_seconds())
+    timings = sd.benchmark_timings(baseline['rows'])
+    if any(timings[name] > limit for name, limit in limits.items()):
+        # One more run before failing, so a busy moment on the host isn't reported as a regression
+        timings = {name: min(seconds, timings[name])
+                   for name, seconds in sd.benchmark_timings(baseline['rows']).items()}
+    slower = {name: f"{timings[name] * 1000:.1f} ms > {limit * 1000:.1f} ms"
+              for name, limit in limits.items() if timings[name] > limit}
+    assert not slower
@@ -0,0 +1,221 @@
+"""
+Scoring, ranking, trends and regional averages checked against plain
+reference implementations on random datasets, plus tiny and tied edge cases.
+"""
+import os
+import sys
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import StateDashboard as sd
+
+
+SEEDS = range(20)
+NUMERIC_COLUMNS = ['Violent_Crime_Avg', 'Property_Crime_Avg', 'Total_Crime_Rate', 'Avg_Rent',
+                   'Safety_Score', 'Affordability_Score'] + sd.RENT_COLUMNS
+
+
+def random_dataset(rng, rows, months=12, regions=4):
+    """
+    Random states in the state_data.csv schema plus a region scheme over
+    them (some states left out). Values are rounded so ties occur, and
+    each row's bedroom rents rise with size.
+    """
+    ids = np.array([f"S{i:05d}" for i in range(rows)])
+    violent = (rng.gamma(4.0, 8.0, (rows, 1)) * rng.uniform(0.7, 1.3, (rows, months))).round(1)
+    property_ = (rng.gamma(6.0, 20.0, (rows, 1)) * rng.uniform(0.7, 1.3, (rows, months))).round(1)
+    rents = (rng.uniform(600, 2500, (rows, 1)) * [1.0, 1.25, 1.6, 1.85]).round(-1)
+    df = pd.DataFrame({
+        'State Id': ids,
+        'State Name': [f"State {i}" for i in range(rows)],
+        'Violent Crime Rate': violent.tolist(),
+        'Property Crime Rate': property_.tolist(),
+    })
+    for j, col in enumerate(sd.RENT_COLUMNS):
+        df[col] = rents[:, j]
+    codes = rng.integers(-1, regions, rows)
+    scheme = {f"Region {k}": ids[codes == k].tolist() for k in range(regions)}
+    return df, scheme
+
+
+def reference_normalize(values):
+    """normalize_inverse written out: lowest value 100, highest 0, all 50 if they are equal"""
+    low, high = min(values), max(values)
+    if high == low:
+        return [50.0] * len(values)
+    return [100 * (high - value) / (high - low) for value in values]
+
+
+def reference_affordability(rents, rent_column):
+    """Affordability per state (bedroom columns are rounded to 0.1, Avg_Rent is not)"""
+    scores = reference_normalize(rents)
+    return scores if rent_column == 'Avg_Rent' else [round(score, 1) for score in scores]
+
+
+def reference_scores(df, rent_column, safety_weight):
+    """Overall score per state: the weighted mean of safety and affordability, rounded to 0.1"""
+    safety = reference_normalize([v + p for v, p in zip(df['Violent_Crime_Avg'], df['Property_Crime_Avg'])])
+    afford = reference_affordability(df[rent_column].tolist(), rent_column)
+    return [round(safety_weight * s + (1 - safety_weight) * a, 1) for s, a in zip(safety, afford)]
+
+
+def reference_trend(values):
+    """compute_trend via a least-squares fit: (slope, label) with +-5 per month as the threshold"""
+    if not isinstance(values, list) or len(values) != 12:
+        return 0, ""
+    slope = np.polyfit(np.arange(12), values, 1)[0]
+    if slope > 5:
+        return slope, "↗ Rising"
+    if slope < -5:
+        return slope, "↘ Falling"
+    return slope, "→ Stable"
+
+
+def reference_pareto(x, y):
+    """pareto_layers by repeatedly peeling off the points nothing remaining dominates"""
+    layers = [None] * len(x)
+    remaining = set(range(len(x)))
+    layer = 0
+    while remaining:
+        front = {i for i in remaining
+                 if not any(x[j] <= x[i] and y[j] <= y[i] and (x[j] < x[i] or y[j] < y[i]) for j in remaining)}
+        for i in front:
+            layers[i] = layer
+        remaining -= front
+        layer += 1
+    return layers
+
+
+@pytest.fixture(params=SEEDS)
+def dataset(request, tmp_path):
+    """(loaded frame, CSV path, binary cache path, region scheme, rng); the first seeds are 1-3 rows"""
+    seed = request.param
+    rng = np.random.default_rng(seed)
+    rows = [1, 2, 3][seed] if seed < 3 else int(rng.integers(4, 120))
+    raw, scheme = random_dataset(rng, rows)
+    if seed % 4 == 3:
+        raw['Two Bedroom Rent'] = 1500.0
+    csv_path, npz_path = str(tmp_path / "data.csv"), str(tmp_path / "data.npz")
+    raw.to_csv(csv_path, index=False)
+    sd.save_binary_cache(raw, npz_path)
+    return sd.load_dataset(csv_path), csv_path, npz_path, scheme, rng
+
+
+def scenarios(rng):
+    """The default settings plus two random (rent column, safety weight in percent) pairs"""
+    return [('Avg_Rent', 50), ('Two Bedroom Rent', int(rng.integers(0, 101))),
+            (sd.RENT_COLUMNS[int(rng.integers(0, 4))], int(rng.integers(0, 101)))]
+
+
+def test_csv_and_binary_cache_load_alike(dataset):
+    df, _, npz_path, _, _ = dataset
+    df_npz = sd.load_dataset(npz_path)
+    assert len(df_npz) == len(df)
+    np.testing.assert_allclose(df_npz[NUMERIC_COLUMNS].to_numpy(dtype=float),
+                               df[NUMERIC_COLUMNS].to_numpy(dtype=float), atol=1e-6)
+
+
+def test_safety_and_affordability(dataset):
+    df = dataset[0]
+    np.testing.assert_allclose(df['Safety_Score'], reference_normalize(df['Total_Crime_Rate'].tolist()), atol=1e-9)
+    for rent_column in ['Avg_Rent'] + sd.RENT_COLUMNS:
+        scores = sd.affordability_scores(df, rent_column)
+        np.testing.assert_allclose(scores, reference_affordability(df[rent_column].tolist(), rent_column), atol=1e-6)
+        assert scores.between(0, 100).all()
+
+
+def test_state_mode_ranking(dataset):
+    df, _, _, _, rng = dataset
+    for rent_column, weight in scenarios(rng):
+        expected = reference_scores(df, rent_column, weight / 100)
+        df_sorted = sd.score_frame(df, rent_column, weight / 100).sort_values('Current_Score', ascending=False)
+        # Tied states may come in any order
+        assert (sorted(zip(df_sorted['Current_Score'], df_sorted['State Name']), reverse=True) ==
+                sorted(zip(expected, df['State Name']), reverse=True))
+        assert (np.diff(df_sorted['Current_Score'].to_numpy()) <= 0).all()
+
+
+def test_api_ranking(dataset):
+    df, csv_path, _, _, rng = dataset
+    api = sd.DashboardAPI(csv_path)
+    for rent_column, weight in scenarios(rng):
+        ranking = api.rankings({'weight': weight, 'rent': rent_column})
+        assert [row['score'] for row in ranking] == sorted(reference_scores(df, rent_column, weight / 100), reverse=True)
+
+
+def test_api_rejects_bad_top(dataset):
+    api = sd.DashboardAPI(dataset[1])
+    assert len(api.rankings({'top': '1'})) == 1
+    for top in ['-1', '1.5', 'x']:
+        assert api.handle('/rankings', {'top': top})[0] == 400
+
+
+def test_region_mode_averages(dataset):
+    df, _, _, scheme, rng = dataset
+    region_index = sd.RegionIndex(df, scheme)
+    safety = reference_normalize(df['Total_Crime_Rate'].tolist())
+    for rent_column, weight in scenarios(rng):
+        overall = reference_scores(df, rent_column, weight / 100)
+        afford = reference_affordability(df[rent_column].tolist(), rent_column)
+        stats = sd.compute_regional_stats(sd.score_frame(df, rent_column, weight / 100), region_index, rent_column)
+        for region, members in scheme.items():
+            rows = [i for i, state_id in enumerate(df['State Id']) if state_id in set(members)]
+            if not rows:
+                assert region not in stats
+                continue
+            assert stats[region]['num_states'] == len(rows)
+            np.testing.assert_allclose(
+                [stats[region][key] for key in ('overall_score', 'safety_score', 'afford_score', 'crime_rate', 'rent')],
+                [np.mean([values[i] for i in rows]) for values in
+                 (overall, safety, afford, df['Total_Crime_Rate'].tolist(), df[rent_column].tolist())],
+                atol=1e-6
+            )
+
+
+def test_sensitivity_surface(dataset):
+    df, _, _, _, rng = dataset
+    surface = sd.SensitivitySurface(df)
+    for rent_column, weight in scenarios(rng):
+        expected = reference_scores(df, rent_column, weight / 100)
+        np.testing.assert_allclose(surface.score_matrix(rent_column)[weight], expected, atol=1e-6)
+        # Ties keep dataset order
+        ranks = [1 + sum(other > score or (other == score and j < i) for j, other in enumerate(expected))
+                 for i, score in enumerate(expected)]
+        state = df['State Name'].iloc[int(rng.integers(0, len(df)))]
+        assert sd.SensitivitySurface(df).state_ranks(state, rent_column)[weight] == ranks[surface.position[state]]
+        assert surface.rank_matrix(rent_column)[weight].tolist() == ranks
+    np.testing.assert_array_equal(surface.state_ranks(state, rent_column),
+                                  surface.rank_matrix(rent_column)[:, surface.position[state]])
+
+
+def test_pareto_layers(dataset):
+    df = dataset[0]
+    for rent_column in ['Avg_Rent'] + sd.RENT_COLUMNS:
+        layers = sd.pareto_layers(df[rent_column].to_numpy(), df['Total_Crime_Rate'].to_numpy())
+        assert layers.tolist() == reference_pareto(df[rent_column].tolist(), df['Total_Crime_Rate'].tolist())
+
+
+def test_crime_trends(dataset):
+    df = dataset[0]
+    for column in ['Violent Crime Rate_x', 'Property Crime Rate_x']:
+        for values in df[column]:
+            slope, label = sd.compute_trend(values)
+            ref_slope, ref_label = reference_trend(values)
+            assert slope == pytest.approx(ref_slope, abs=1e-9) and label == ref_label
+    totals = [list(np.add(v, p)) for v, p in zip(df['Violent Crime Rate_x'], df['Property Crime Rate_x'])]
+    np.testing.assert_allclose(sd.crime_trend_slopes(df), [reference_trend(t)[0] for t in totals], atol=1e-9)
+
+
+def test_trend_of_a_short_series():
+    assert sd.compute_trend([1.0, 2.0]) == (0, "")
+
+
+def test_warm_start_round_trip(dataset):
+    df = dataset[0]
+    arrays, columns = sd.frame_arrays(df)
+    assert sd.frame_from_arrays(arrays, columns).equals(df)